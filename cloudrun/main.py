@@ -12,10 +12,18 @@ from google.genai.types import EmbedContentConfig
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from categorize_utils import llm_suggest_categorization, categorize_papers
+from singleflight_utils import SingleFlight
 
 # Default similarity threshold for paper search
 DEFAULT_SIMILARITY_THRESHOLD = 0.66
 
+# 同時に来た同一の検索をまとめる際、followerがleaderを待つ最大秒数
+EMBEDDING_COALESCE_TIMEOUT = float(os.environ.get("EMBEDDING_COALESCE_TIMEOUT", 10))
+SEARCH_COALESCE_TIMEOUT = float(os.environ.get("SEARCH_COALESCE_TIMEOUT", 10))
+
+_embedding_flight = SingleFlight()
+_search_flight = SingleFlight()
+
 
 
 def log_structured(severity: str, message: str, **kwargs):
@@ -34,6 +42,10 @@ app = Flask(__name__)
 firebase_admin.initialize_app()
 
 
+class DatabaseConnectionError(Exception):
+    """Raised when a database connection cannot be established"""
+
+
 def get_db_connection():
     """Create a database connection"""
     try:
@@ -90,6 +102,80 @@ def generate_query_embedding(
     return response.embeddings[0].values
 
 
+def generate_query_embedding_coalesced(query: str) -> list[float]:
+    """Share one in-flight embedding request among concurrent identical queries"""
+    return _embedding_flight.do(
+        query,
+        lambda: generate_query_embedding(init_genai_client(), query),
+        timeout=EMBEDDING_COALESCE_TIMEOUT,
+    )
+
+
+def _fetch_nearest_papers(
+    input_embedding: tuple[float, ...],
+    conference_filters: tuple[tuple[str, int], ...],
+) -> list[dict]:
+    """Fetch nearest papers without threshold so the rows can be shared among callers"""
+    conn = get_db_connection()
+    if not conn:
+        raise DatabaseConnectionError("Database connection failed")
+
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            input_embedding_vector = json.dumps(list(input_embedding))
+
+            # Build conference filter clause
+            conf_clause = ""
+            conf_params: list = []
+            if conference_filters:
+                conditions = []
+                for name_key, year in conference_filters:
+                    conditions.append(
+                        "(LOWER(REPLACE(conference_name, ' ', '')) = %s AND conference_year = %s)"
+                    )
+                    conf_params.extend([name_key, year])
+                conf_clause = "WHERE " + " OR ".join(conditions)
+
+            # Use CTE and inner LIMIT to optimize vector search
+            query = f"""
+                WITH query_vec AS (
+                    SELECT %s::vector AS q
+                ),
+                filtered_papers AS (
+                    SELECT * FROM papers
+                    {conf_clause}
+                )
+                SELECT
+                    id,
+                    title,
+                    url,
+                    abstract,
+                    conference_name,
+                    conference_year,
+                    1 - (filtered_papers.embedding <=> query_vec.q) AS cosine_similarity
+                FROM filtered_papers, query_vec
+                ORDER BY filtered_papers.embedding <=> query_vec.q ASC
+                LIMIT 500;
+            """
+            cur.execute(query, (input_embedding_vector, *conf_params))
+            return cur.fetchall()
+    finally:
+        conn.close()
+
+
+def fetch_nearest_papers_coalesced(
+    input_embedding: list[float], conference_filters: list[tuple[str, int]]
+) -> list[dict]:
+    """Share one in-flight DB lookup among concurrent identical searches"""
+    # OR条件なので順序・重複を正規化してキーを揃える
+    key = (tuple(input_embedding), tuple(sorted(set(conference_filters))))
+    return _search_flight.do(
+        key,
+        lambda: _fetch_nearest_papers(*key),
+        timeout=SEARCH_COALESCE_TIMEOUT,
+    )
+
+
 @app.route("/", methods=["POST"])
 def search():
     request_id = None
@@ -152,9 +238,8 @@ def search():
         except (ValueError, TypeError):
             similarity_threshold = DEFAULT_SIMILARITY_THRESHOLD
 
-        # Initialize Client (API Key or Vertex AI)
-        client = init_genai_client()
-        input_embedding = generate_query_embedding(client, keyword)
+        # Identical concurrent keywords share one embedding request
+        input_embedding = generate_query_embedding_coalesced(keyword)
 
         # Log the request
         request_id = str(uuid.uuid4())[:8]
@@ -165,96 +250,47 @@ def search():
             keyword=keyword,
             conferences=conferences
         )
-        
-        # Connect to DB
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({"error": "Database connection failed"}), 500
-            
+
+        # Identical concurrent searches share one DB lookup; threshold is applied per caller
         try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                input_embedding_vector = json.dumps(input_embedding)
-                
-                # Build conference filter clause
-                conf_clause = ""
-                conf_params: list = []
-                if conference_filters:
-                    conditions = []
-                    for name_key, year in conference_filters:
-                        conditions.append(
-                            "(LOWER(REPLACE(conference_name, ' ', '')) = %s AND conference_year = %s)"
-                        )
-                        conf_params.extend([name_key, year])
-                    conf_clause = "WHERE " + " OR ".join(conditions)
-                
-                # Use CTE and inner LIMIT to optimize vector search
-                query = f"""
-                    WITH query_vec AS (
-                        SELECT %s::vector AS q
-                    ),
-                    filtered_papers AS (
-                        SELECT * FROM papers
-                        {conf_clause}
-                    )
-                    SELECT * FROM (
-                        SELECT
-                            id,
-                            title,
-                            url,
-                            abstract,
-                            conference_name,
-                            conference_year,
-                            1 - (filtered_papers.embedding <=> query_vec.q) AS cosine_similarity
-                        FROM filtered_papers, query_vec
-                        ORDER BY filtered_papers.embedding <=> query_vec.q ASC
-                        LIMIT 500
-                    ) sub
-                    WHERE cosine_similarity >= %s;
-                """
-                cur.execute(
-                    query,
-                    (
-                        input_embedding_vector,
-                        *conf_params,
-                        similarity_threshold,
-                    ),
-                )
-                rows = cur.fetchall()
-                
-                # Convert to camelCase for frontend compatibility
-                papers = []
-                for row in rows:
-                    papers.append({
-                        "id": row["id"],
-                        "title": row["title"],
-                        "url": row["url"],
-                        "abstract": row["abstract"],
-                        "conferenceName": row["conference_name"],
-                        "conferenceYear": row["conference_year"],
-                        "cosineSimilarity": float(row["cosine_similarity"]),
-                    })
-                
-                log_structured(
-                    "INFO",
-                    f"Fetched {len(papers)} papers",
-                    request_id=request_id,
-                    count=len(papers)
-                )
-                
-                return jsonify({
-                    "conferences": conferences,
-                    "keyword": keyword,
-                    "papers": papers,
-                    "count": len(papers),
-                    "threshold": similarity_threshold,
-                    "message": (
-                        f"{len(papers)}件の論文が見つかりました "
-                        f"(コサイン類似度 ≥ {similarity_threshold})"
-                    ),
-                })
-                
-        finally:
-            conn.close()
+            rows = fetch_nearest_papers_coalesced(input_embedding, conference_filters)
+        except DatabaseConnectionError:
+            return jsonify({"error": "Database connection failed"}), 500
+
+        # Convert to camelCase for frontend compatibility
+        papers = []
+        for row in rows:
+            cosine_similarity = float(row["cosine_similarity"])
+            if cosine_similarity < similarity_threshold:
+                continue
+            papers.append({
+                "id": row["id"],
+                "title": row["title"],
+                "url": row["url"],
+                "abstract": row["abstract"],
+                "conferenceName": row["conference_name"],
+                "conferenceYear": row["conference_year"],
+                "cosineSimilarity": cosine_similarity,
+            })
+
+        log_structured(
+            "INFO",
+            f"Fetched {len(papers)} papers",
+            request_id=request_id,
+            count=len(papers)
+        )
+
+        return jsonify({
+            "conferences": conferences,
+            "keyword": keyword,
+            "papers": papers,
+            "count": len(papers),
+            "threshold": similarity_threshold,
+            "message": (
+                f"{len(papers)}件の論文が見つかりました "
+                f"(コサイン類似度 ≥ {similarity_threshold})"
+            ),
+        })
 
     except Exception as e:
         log_structured(
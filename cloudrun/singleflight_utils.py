@@ -0,0 +1,79 @@
+import copy
+import threading
+from typing import Any, Callable, Hashable
+
+
+class _InFlightCall:
+    def __init__(self, event_factory: Callable[[], threading.Event]):
+        self.done = event_factory()
+        self.result: Any = None
+        self.error: Exception | None = None
+
+
+def _copy_error(error: Exception) -> Exception:
+    # スレッドごとに別のtracebackを持たせるため、leaderの例外オブジェクトを複製して投げる
+    try:
+        return copy.copy(error)
+    except Exception:
+        return RuntimeError(str(error))
+
+
+class SingleFlight:
+    """
+    同一キーの処理が実行中の場合、後続の呼び出しは新たに実行せず先行呼び出し(leader)の結果を共有する．
+    結果はキャッシュせず、実行中の呼び出しのみを束ねる．
+
+    leaderが応答しない場合に後続(follower)が待ち続けないよう、timeout秒を超えたら
+    followerがそのキーのleaderを引き継ぎ、以降の呼び出しは新しいleaderに合流する．
+
+    event_factory: 完了通知に使うEventの生成関数．テストでfollowerの待機を観測するために差し替える．
+    """
+
+    def __init__(self, event_factory: Callable[[], threading.Event] = threading.Event):
+        self._event_factory = event_factory
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _InFlightCall] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: float) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _InFlightCall(self._event_factory)
+                is_leader = True
+            else:
+                is_leader = False
+
+        while not is_leader:
+            if not call.done.wait(timeout):
+                with self._lock:
+                    # timeoutと同時にleaderが完了していれば、その結果をそのまま使う
+                    if not call.done.is_set():
+                        # leaderが詰まっているので引き継ぐ．既に別のfollowerが引き継いでいればそちらに合流する
+                        current = self._calls.get(key)
+                        if current is None or current is call:
+                            call = self._calls[key] = _InFlightCall(self._event_factory)
+                            is_leader = True
+                        else:
+                            call = current
+                        continue
+
+            if call.error is not None:
+                raise _copy_error(call.error) from call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException:
+            # SystemExit等はleaderのスレッドだけに留め、followerには通常の例外として伝える
+            call.error = RuntimeError("Single-flight leader was interrupted")
+            raise
+        finally:
+            # 完了の通知もロック内で行い、完了済みの呼び出しが詰まったleaderと誤認されないようにする
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call.done.set()
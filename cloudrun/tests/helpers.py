@@ -0,0 +1,97 @@
+import threading
+
+WAIT_SECONDS = 5
+
+
+class BlockingFn:
+    """Blocks until release is set, then returns value (or raises error)"""
+
+    def __init__(self, value=None, error=None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        self.started.set()
+        self.release.wait(WAIT_SECONDS)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class _TrackedEvent(threading.Event):
+    def __init__(self, tracker, behavior):
+        super().__init__()
+        self._tracker = tracker
+        self._behavior = behavior
+        self.waiters = 0
+
+    def wait(self, timeout=None):
+        with self._tracker.changed:
+            self.waiters += 1
+            self._tracker.changed.notify_all()
+        if self._behavior == "timeout":
+            # leaderが詰まっている状態を、実時間のtimeoutを待たずに再現する
+            return False
+        if self._behavior == "late_timeout":
+            # leaderの完了と同時にtimeoutした状態を再現する
+            self._behavior = None
+            super().wait(WAIT_SECONDS)
+            return False
+        return super().wait(timeout)
+
+
+class EventTracker:
+    """
+    SingleFlightのevent_factoryとして渡し、followerが待機を始めたかをテストから観測する．
+    behaviors[i] で i番目に作られたEventのwaitの挙動を指定できる．
+        "timeout": 即座にtimeoutしたものとして False を返す
+        "late_timeout": 完了を待ってから一度だけ False を返す
+    """
+
+    def __init__(self, behaviors=None):
+        self.behaviors = behaviors or {}
+        self.changed = threading.Condition()
+        self.events = []
+
+    def __call__(self):
+        with self.changed:
+            event = _TrackedEvent(self, self.behaviors.get(len(self.events)))
+            self.events.append(event)
+            self.changed.notify_all()
+            return event
+
+    def wait_for_waiters(self, index, count):
+        with self.changed:
+            parked = self.changed.wait_for(
+                lambda: len(self.events) > index and self.events[index].waiters >= count,
+                WAIT_SECONDS,
+            )
+        if not parked:
+            raise AssertionError(f"{count} followers did not start waiting on event {index}")
+
+
+def run_in_threads(target, count):
+    results = [None] * count
+    errors = [None] * count
+
+    def worker(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def join_all(threads):
+    for t in threads:
+        t.join(WAIT_SECONDS)
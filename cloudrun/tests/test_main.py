@@ -0,0 +1,138 @@
+import unittest
+from unittest import mock
+
+import main
+from singleflight_utils import SingleFlight
+from tests.helpers import BlockingFn, EventTracker, join_all, run_in_threads
+
+EMBEDDING = [0.1, 0.2, 0.3]
+
+ROWS = [
+    {
+        "id": i,
+        "title": f"Paper {i}",
+        "url": f"https://example.com/{i}",
+        "abstract": "abstract",
+        "conference_name": "CVPR",
+        "conference_year": 2025,
+        "cosine_similarity": similarity,
+    }
+    for i, similarity in enumerate([0.9, 0.7, 0.6, 0.4])
+]
+
+
+class BlockingFetch(BlockingFn):
+    """Stub for _fetch_nearest_papers that records its arguments"""
+
+    def __init__(self, value=None, error=None):
+        super().__init__(value=value, error=error)
+        self.args = []
+
+    def __call__(self, *args):
+        self.args.append(args)
+        return super().__call__()
+
+
+class SearchCoalescingTest(unittest.TestCase):
+    def setUp(self):
+        self.tracker = EventTracker()
+        patches = [
+            mock.patch.object(main, "_search_flight", SingleFlight(event_factory=self.tracker)),
+            mock.patch.object(main, "_embedding_flight", SingleFlight()),
+            mock.patch.object(main.auth, "verify_id_token", return_value={"uid": "user"}),
+            mock.patch.object(main, "init_genai_client", return_value=None),
+            mock.patch.object(main, "generate_query_embedding", return_value=EMBEDDING),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def post_search(self, body):
+        response = main.app.test_client().post(
+            "/", json=body, headers={"Authorization": "Bearer token"}
+        )
+        return response.status_code, response.get_json()
+
+    def test_callers_with_different_thresholds_share_one_lookup(self):
+        fetch = BlockingFetch(value=ROWS)
+        with mock.patch.object(main, "_fetch_nearest_papers", fetch):
+            leader_threads, leader_results, _ = run_in_threads(
+                lambda: self.post_search({"keyword": "diffusion", "threshold": 0.5}), 1
+            )
+            fetch.started.wait(5)
+            threads, results, _ = run_in_threads(
+                lambda: self.post_search({"keyword": "diffusion", "threshold": 0.8}), 1
+            )
+            self.tracker.wait_for_waiters(0, 1)
+            fetch.release.set()
+            join_all(leader_threads + threads)
+
+        self.assertEqual(fetch.calls, 1)
+
+        status, body = leader_results[0]
+        self.assertEqual(status, 200)
+        self.assertEqual(body["count"], 3)
+        self.assertEqual([p["id"] for p in body["papers"]], [0, 1, 2])
+        self.assertEqual(body["threshold"], 0.5)
+
+        status, body = results[0]
+        self.assertEqual(status, 200)
+        self.assertEqual(body["count"], 1)
+        self.assertEqual([p["id"] for p in body["papers"]], [0])
+        self.assertEqual(body["papers"][0]["cosineSimilarity"], 0.9)
+        self.assertEqual(body["threshold"], 0.8)
+
+    def test_conference_filters_are_normalized_into_key(self):
+        fetch = BlockingFetch(value=ROWS)
+        with mock.patch.object(main, "_fetch_nearest_papers", fetch):
+            leader_threads, _, _ = run_in_threads(
+                lambda: main.fetch_nearest_papers_coalesced(
+                    EMBEDDING, [("iccv", 2023), ("cvpr", 2025), ("cvpr", 2025)]
+                ),
+                1,
+            )
+            fetch.started.wait(5)
+            threads, results, _ = run_in_threads(
+                lambda: main.fetch_nearest_papers_coalesced(
+                    EMBEDDING, [("cvpr", 2025), ("iccv", 2023)]
+                ),
+                1,
+            )
+            self.tracker.wait_for_waiters(0, 1)
+            fetch.release.set()
+            join_all(leader_threads + threads)
+
+        self.assertEqual(fetch.calls, 1)
+        self.assertEqual(
+            fetch.args, [(tuple(EMBEDDING), (("cvpr", 2025), ("iccv", 2023)))]
+        )
+        self.assertEqual(results, [ROWS])
+
+    def test_different_conference_filters_do_not_share_lookup(self):
+        with mock.patch.object(main, "_fetch_nearest_papers", return_value=ROWS) as fetch:
+            main.fetch_nearest_papers_coalesced(EMBEDDING, [("cvpr", 2025)])
+            main.fetch_nearest_papers_coalesced(EMBEDDING, [("iccv", 2023)])
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_db_connection_failure_returns_original_response_to_all_callers(self):
+        fetch = BlockingFetch(error=main.DatabaseConnectionError("Database connection failed"))
+        with mock.patch.object(main, "_fetch_nearest_papers", fetch):
+            leader_threads, leader_results, _ = run_in_threads(
+                lambda: self.post_search({"keyword": "diffusion"}), 1
+            )
+            fetch.started.wait(5)
+            threads, results, _ = run_in_threads(
+                lambda: self.post_search({"keyword": "diffusion"}), 2
+            )
+            self.tracker.wait_for_waiters(0, 2)
+            fetch.release.set()
+            join_all(leader_threads + threads)
+
+        self.assertEqual(fetch.calls, 1)
+        for status, body in leader_results + results:
+            self.assertEqual(status, 500)
+            self.assertEqual(body, {"error": "Database connection failed"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import unittest
+
+from singleflight_utils import SingleFlight
+from tests.helpers import BlockingFn, EventTracker, join_all, run_in_threads
+
+
+class SingleFlightTest(unittest.TestCase):
+    def test_concurrent_calls_share_leader_result(self):
+        tracker = EventTracker()
+        flight = SingleFlight(event_factory=tracker)
+        fn = BlockingFn(value=[1, 2, 3])
+
+        leader_threads, leader_results, _ = run_in_threads(lambda: flight.do("k", fn, timeout=5), 1)
+        fn.started.wait(5)
+        threads, results, errors = run_in_threads(lambda: flight.do("k", fn, timeout=5), 5)
+        tracker.wait_for_waiters(0, 5)
+        fn.release.set()
+        join_all(leader_threads + threads)
+
+        self.assertEqual(fn.calls, 1)
+        self.assertEqual(leader_results, [[1, 2, 3]])
+        self.assertEqual(results, [[1, 2, 3]] * 5)
+        self.assertEqual(errors, [None] * 5)
+        # 完了後は結果を使い回さず、新しい呼び出しとして実行される
+        self.assertEqual(flight.do("k", lambda: "second", timeout=5), "second")
+
+    def test_different_keys_run_separately(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do("a", lambda: 1, timeout=1), 1)
+        self.assertEqual(flight.do("b", lambda: 2, timeout=1), 2)
+
+    def test_leader_error_propagates_to_followers(self):
+        tracker = EventTracker()
+        flight = SingleFlight(event_factory=tracker)
+        fn = BlockingFn(error=ValueError("boom"))
+
+        leader_threads, _, leader_errors = run_in_threads(lambda: flight.do("k", fn, timeout=5), 1)
+        fn.started.wait(5)
+        threads, _, errors = run_in_threads(lambda: flight.do("k", fn, timeout=5), 3)
+        tracker.wait_for_waiters(0, 3)
+        fn.release.set()
+        join_all(leader_threads + threads)
+
+        self.assertEqual(fn.calls, 1)
+        self.assertIs(leader_errors[0], fn.error)
+        for error in errors:
+            self.assertIsInstance(error, ValueError)
+            self.assertEqual(str(error), "boom")
+            # followerはそれぞれ別の例外オブジェクトを受け取り、leaderの例外にチェーンされる
+            self.assertIsNot(error, fn.error)
+            self.assertIs(error.__cause__, fn.error)
+        self.assertEqual(len({id(e) for e in errors}), 3)
+        self.assertEqual(flight.do("k", lambda: "ok", timeout=5), "ok")
+
+    def test_entry_is_removed_after_error(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            flight.do("k", fail, timeout=1)
+        self.assertEqual(flight.do("k", lambda: "ok", timeout=1), "ok")
+
+    def test_interrupted_leader_gives_followers_runtime_error(self):
+        tracker = EventTracker()
+        flight = SingleFlight(event_factory=tracker)
+        fn = BlockingFn(error=KeyboardInterrupt())
+        leader_errors = []
+
+        def leader():
+            try:
+                flight.do("k", fn, timeout=5)
+            except BaseException as e:
+                leader_errors.append(e)
+
+        leader_threads, _, _ = run_in_threads(leader, 1)
+        fn.started.wait(5)
+        threads, _, errors = run_in_threads(lambda: flight.do("k", fn, timeout=5), 2)
+        tracker.wait_for_waiters(0, 2)
+        fn.release.set()
+        join_all(leader_threads + threads)
+
+        self.assertIsInstance(leader_errors[0], KeyboardInterrupt)
+        for error in errors:
+            self.assertIsInstance(error, RuntimeError)
+
+    def test_follower_takes_over_stuck_leader(self):
+        # 最初のleaderのEventは常にtimeoutする(=leaderが詰まっている)
+        tracker = EventTracker(behaviors={0: "timeout"})
+        flight = SingleFlight(event_factory=tracker)
+        stuck = BlockingFn(value="stale")
+        stuck_threads, stuck_results, _ = run_in_threads(lambda: flight.do("k", stuck, timeout=5), 1)
+        stuck.started.wait(5)
+
+        fresh = BlockingFn(value="fresh")
+        first_threads, first_results, _ = run_in_threads(lambda: flight.do("k", fresh, timeout=5), 1)
+        fresh.started.wait(5)
+
+        # 以降の呼び出しは詰まったleaderではなく、引き継いだleaderに合流する
+        threads, results, _ = run_in_threads(lambda: flight.do("k", fresh, timeout=5), 4)
+        tracker.wait_for_waiters(1, 4)
+        fresh.release.set()
+        join_all(first_threads + threads)
+
+        self.assertEqual(fresh.calls, 1)
+        self.assertEqual(first_results, ["fresh"])
+        self.assertEqual(results, ["fresh"] * 4)
+
+        # 遅れて終わった古いleaderは、その後に始まったleaderのエントリを消さない
+        newer = BlockingFn(value="newer")
+        newer_threads, _, _ = run_in_threads(lambda: flight.do("k", newer, timeout=5), 1)
+        newer.started.wait(5)
+        stuck.release.set()
+        join_all(stuck_threads)
+        self.assertEqual(stuck_results, ["stale"])
+
+        joiner = BlockingFn(value="joiner")
+        joiner_threads, joiner_results, _ = run_in_threads(lambda: flight.do("k", joiner, timeout=5), 1)
+        tracker.wait_for_waiters(2, 1)
+        newer.release.set()
+        join_all(newer_threads + joiner_threads)
+        self.assertEqual(joiner.calls, 0)
+        self.assertEqual(joiner_results, ["newer"])
+
+    def test_only_one_follower_takes_over(self):
+        tracker = EventTracker(behaviors={0: "timeout"})
+        flight = SingleFlight(event_factory=tracker)
+        stuck = BlockingFn(value="stale")
+        stuck_threads, _, _ = run_in_threads(lambda: flight.do("k", stuck, timeout=5), 1)
+        stuck.started.wait(5)
+
+        fresh = BlockingFn(value="fresh")
+        threads, results, _ = run_in_threads(lambda: flight.do("k", fresh, timeout=5), 5)
+        fresh.started.wait(5)
+        # 引き継いだ1件以外の4件が新しいleaderで待機するまで完了させない
+        tracker.wait_for_waiters(1, 4)
+        fresh.release.set()
+        join_all(threads)
+
+        self.assertEqual(fresh.calls, 1)
+        self.assertEqual(results, ["fresh"] * 5)
+        stuck.release.set()
+        join_all(stuck_threads)
+
+    def test_timeout_at_leader_completion_uses_leader_result(self):
+        # followerのtimeoutとleaderの完了が重なっても、完了済みの結果を使い再実行しない
+        tracker = EventTracker(behaviors={0: "late_timeout"})
+        flight = SingleFlight(event_factory=tracker)
+        fn = BlockingFn(value="done")
+
+        leader_threads, _, _ = run_in_threads(lambda: flight.do("k", fn, timeout=5), 1)
+        fn.started.wait(5)
+        threads, results, _ = run_in_threads(lambda: flight.do("k", fn, timeout=5), 1)
+        tracker.wait_for_waiters(0, 1)
+        fn.release.set()
+        join_all(leader_threads + threads)
+
+        self.assertEqual(fn.calls, 1)
+        self.assertEqual(results, ["done"])
+
+
+if __name__ == "__main__":
+    unittest.main()